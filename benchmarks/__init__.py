@@ -0,0 +1 @@
+# Headless benchmarks for the data pipeline; run them with `python -m benchmarks.<name>` from the repository root.
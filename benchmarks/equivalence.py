@@ -0,0 +1,100 @@
+import argparse
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import generate
+from pipeline import instrumentation
+from pipeline.incremental import refresh
+from pipeline.parallel import parallel_aggregates
+from pipeline.streaming import stream_aggregates
+
+# Checks that the repository aggregate engines agree with each other on a synthetic dataset. The CSV is folded once
+# in a single chunk as the reference, then chunk by chunk with either de-duplication and on several worker counts, and
+# every result a RunningAggregates exposes is compared with the reference. The incremental refresh is checked on a
+# copy of the CSV that grows in three parts, each cut in the middle of a line, and must end up with the same results
+# while only reading the appended bytes. Exits with status 1 on any difference.
+
+WORKERS = [1, 2, 4]
+
+
+def results(running):
+    """Everything a ``RunningAggregates`` reports, by name; top-k rows without their engine-specific row labels."""
+    values = {
+        'rows': running.rows,
+        'trend_counts': running.trend_counts(),
+        'language_counts': running.language_counts(),
+        'license_counts': running.license_counts(),
+    }
+    for column in running.topColumns:
+        values[f'top_rows:{column}'] = running.top_rows(column).reset_index(drop=True)
+    return values
+
+
+def differences(expected, actual):
+    """Names of the results in which ``actual`` differs from ``expected``."""
+    expected, actual = results(expected), results(actual)
+    return [name for name, value in expected.items()
+            if not (value.equals(actual[name]) if isinstance(value, (pd.Series, pd.DataFrame)) else
+                    value == actual[name])]
+
+
+def check(name, expected, actual):
+    mismatches = differences(expected, actual)
+    print(f'{name:<44}{"ok" if not mismatches else "differs in " + ", ".join(mismatches)}')
+    return not mismatches
+
+
+def engine_checks(path, chunksize):
+    yield 'streaming, hash de-duplication', stream_aggregates(path, chunksize, 'hash')
+    yield 'streaming, external de-duplication', stream_aggregates(path, chunksize, 'external')
+    for workers in WORKERS:
+        yield f'parallel, {workers} workers', parallel_aggregates(path, workers)
+
+
+def refresh_cut_and_append(path, chunksize, directory, parts=3):
+    """Refresh a copy of ``path`` after writing each of ``parts`` pieces; returns the last result and refresh modes."""
+    data = path.read_bytes()
+    copy, statePath = Path(directory) / path.name, Path(directory) / 'incremental.pkl'
+    # Cut a few bytes into a line, so each refresh but the last leaves a partial line for the next one
+    cuts = [len(data) * part // parts + 7 for part in range(1, parts)] + [len(data)]
+    instrumentation.clear()
+    written = 0
+    for cut in cuts:
+        with open(copy, 'ab') as file:
+            file.write(data[written:cut])
+        written = cut
+        running = refresh(copy, chunksize, statePath=statePath)
+    modes = [record['stage'].split(':')[1] for record in instrumentation.records()
+             if record['stage'].startswith('refresh:')]
+    return running, modes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the aggregate engines agree on a synthetic dataset.')
+    parser.add_argument('--rows', type=int, default=10_000, help='distinct rows of the dataset (default %(default)s)')
+    parser.add_argument('--directory', type=Path, default=None, help='where the synthetic CSVs are generated')
+    parser.add_argument('--chunksize', type=int, default=None, help='rows per chunk (default: a seventh of --rows)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+    path = generate(args.rows, args.directory) / 'repository_data.csv'
+    chunksize = args.chunksize or max(args.rows // 7, 1)
+    # A single chunk leaves nothing for the chunk boundaries, de-duplication or range merging to get wrong
+    expected = stream_aggregates(path, chunksize=2 * args.rows + 1, deduplication='hash')
+    passed = all([check(name, expected, actual) for name, actual in engine_checks(path, chunksize)])
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        running, modes = refresh_cut_and_append(path, chunksize, directory)
+    passed &= check('refresh, cut and appended twice', expected, running)
+    # A refresh that fell back to a full pass would give the same results, so the modes are checked too
+    incremental = modes == ['full'] + ['incremental'] * (len(modes) - 1)
+    print(f'{"refresh modes":<44}{"ok" if incremental else "not one full, then incremental: " + ", ".join(modes)}')
+    passed &= incremental
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks.synthetic import SCALES, generate
+from pipeline import instrumentation
+from pipeline.aggregates import language_trend_from_counts
+from pipeline.cleaning import NO_LANGUAGE, clean_github_data, clean_repository_data
+from pipeline.compaction import LanguageLists
+from pipeline.language_index import LanguageIndex
+from pipeline.loader import read_github_csv, read_repository_csv
+from pipeline.parallel import parallel_aggregates
+from pipeline.preparation import prepare_github_data, prepare_repository_data
+from pipeline.streaming import TOP_COLUMNS, RunningAggregates, masked_counts, stream_aggregates
+from pipeline.topk import top_k, top_k_rows
+
+# Headless benchmark of the load -> clean -> prepare -> aggregate pipeline on synthetic datasets of several sizes.
+# Every (size, engine) run happens in a fresh process, so the peak memory of one run does not leak into the next.
+#
+#   frame      whole-frame pandas, the path app.py's cache build takes by default; timed stage by stage
+#   streaming  pipeline/streaming.py in bounded memory; the stages are interleaved, so reported as one
+#   parallel   pipeline/parallel.py on every core; also reported as one stage, and its memory is the parent process's
+#              only, not the workers'
+#
+# Results can be saved with --output and compared against a saved run with --baseline.
+
+ENGINES = ['frame', 'streaming', 'parallel']
+
+
+def aggregate(githubDataFrame, repositoryDataFrame):
+    """The chart data app.py shows, computed straight from the prepared frames."""
+    specified = (githubDataFrame['Language'] != NO_LANGUAGE).to_numpy()
+    top_k_rows(githubDataFrame, 'Contributors')
+    masked_counts(githubDataFrame['Language'], specified)
+    top_k(githubDataFrame, ['Issue Count'], labels=['Repository Name'], mask=specified)
+    running = RunningAggregates(TOP_COLUMNS).update(repositoryDataFrame)
+    language_trend_from_counts(running.trend_counts())
+    LanguageIndex.from_language_lists(LanguageLists.from_strings(repositoryDataFrame['Languages Used'])).counts()
+    return running
+
+
+def _run_frame(directory):
+    with instrumentation.stage('load') as details:
+        githubDataFrame = read_github_csv(directory / 'github_dataset.csv')
+        repositoryDataFrame = read_repository_csv(directory / 'repository_data.csv')
+        details['rows'] = len(repositoryDataFrame)
+    with instrumentation.stage('clean'):
+        githubDataFrame = clean_github_data(githubDataFrame)
+        repositoryDataFrame = clean_repository_data(repositoryDataFrame)
+    with instrumentation.stage('prepare'):
+        githubDataFrame = prepare_github_data(githubDataFrame)
+        repositoryDataFrame = prepare_repository_data(repositoryDataFrame)
+    with instrumentation.stage('aggregate'):
+        aggregate(githubDataFrame, repositoryDataFrame)
+    return details['rows']
+
+
+def _run_engine(directory, engine):
+    with instrumentation.stage('load+clean+prepare+aggregate') as details:
+        if engine == 'streaming':
+            running = stream_aggregates(directory / 'repository_data.csv')
+        else:
+            running = parallel_aggregates(directory / 'repository_data.csv')
+        details['distinctRows'] = running.rows
+    # Raw row count for the throughput column; not part of the timed stage
+    with open(directory / 'repository_data.csv', 'rb') as file:
+        return sum(block.count(b'\n') for block in iter(lambda: file.read(1 << 20), b'')) - 1
+
+
+def run(directory, engine):
+    """Run one engine over the CSVs in ``directory``; returns a row per top-level stage."""
+    instrumentation.clear()
+    rows = _run_frame(directory) if engine == 'frame' else _run_engine(directory, engine)
+    results = []
+    for record in instrumentation.records():
+        if record['parent'] is not None:
+            continue
+        results.append({
+            'stage': record['stage'],
+            'seconds': record['seconds'],
+            'rowsPerSecond': rows / record['seconds'] if record['seconds'] else None,
+            'peakRssMiB': record['peakRss'] / 2 ** 20,
+            'growthMiB': (record['peakRss'] - record['startRss']) / 2 ** 20,
+        })
+    return {'rows': rows, 'engine': engine, 'stages': results}
+
+
+def run_isolated(directory, engine):
+    # A fresh interpreter per run: freed memory is not always returned to the OS, which would skew the next peak
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(run, directory, engine).result()
+
+
+def _key(result, stage):
+    return f'{result["rows"]}/{result["engine"]}/{stage["stage"]}'
+
+
+def report(results, baseline=None):
+    previous = {}
+    for result in baseline or []:
+        for stage in result['stages']:
+            previous[_key(result, stage)] = stage['seconds']
+    print(f'{"Rows":>11} {"Engine":<10}{"Stage":<30}{"Seconds":>9}{"Rows/s":>13}{"Peak MiB":>10}{"Growth MiB":>12}'
+          + (f'{"vs baseline":>13}' if baseline else ''))
+    for result in results:
+        for stage in result['stages']:
+            line = (f'{result["rows"]:>11,} {result["engine"]:<10}{stage["stage"]:<30}{stage["seconds"]:>9.3f}'
+                    f'{stage["rowsPerSecond"] or 0:>13,.0f}{stage["peakRssMiB"]:>10.0f}{stage["growthMiB"]:>12.0f}')
+            if baseline and _key(result, stage) in previous:
+                line += f'{previous[_key(result, stage)] / stage["seconds"]:>12.2f}x'
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages on synthetic datasets.')
+    parser.add_argument('--rows', type=int, nargs='+', default=SCALES, help='dataset sizes (default: %(default)s)')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES)
+    parser.add_argument('--directory', type=Path, default=None, help='where the synthetic CSVs are generated')
+    parser.add_argument('--output', type=Path, default=None, help='save the results as JSON')
+    parser.add_argument('--baseline', type=Path, default=None, help='results JSON of an earlier run to compare with')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    results = []
+    for rows in args.rows:
+        directory = generate(rows, args.directory)
+        for engine in args.engines:
+            results.append(run_isolated(directory, engine))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    report(results, json.loads(args.baseline.read_text()) if args.baseline else None)
+
+
+if __name__ == '__main__':
+    main()
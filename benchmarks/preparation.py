@@ -0,0 +1,68 @@
+import argparse
+import timeit
+
+import pandas as pd
+
+from pipeline.loader import (GITHUB_DATASET, REPOSITORY_DATASET, REPOSITORY_DATE_FORMAT, read_github_csv,
+                             read_repository_csv)
+from pipeline.preparation import GITHUB_COLUMNS, REPOSITORY_COLUMNS, _rename, creation_year
+
+# Before/after timings of the preparation steps on the real CSVs: the per-row str.split calls and column-rename loops
+# app.py used to run, against the vectorised versions in pipeline/preparation.py.
+
+
+def split_names_before(githubDataFrame):
+    return (githubDataFrame.repositories.str.split('/').str[1], githubDataFrame.repositories.str.split('/').str[0])
+
+
+def split_names_after(githubDataFrame):
+    parts = githubDataFrame.repositories.str.partition('/')
+    return parts[2], parts[0]
+
+
+def year_before(createdAt):
+    return createdAt.str.split('-').str[0]
+
+
+def rename_before(dataFrame, newColumns):
+    oldColumns = dataFrame.columns
+    for index in range(len(oldColumns)):
+        dataFrame = dataFrame.rename(columns={oldColumns[index]: newColumns[index]})
+    return dataFrame
+
+
+def best_of(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the vectorised preparation steps against the old ones.')
+    parser.add_argument('--nrows', type=int, default=None, help='only read this many repository rows')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    githubDataFrame = read_github_csv(GITHUB_DATASET)
+    # The old code split the raw created_at strings, so read them once unparsed as well
+    createdAt = pd.read_csv(REPOSITORY_DATASET, usecols=['created_at'], nrows=args.nrows)['created_at']
+    repositoryDataFrame = read_repository_csv(REPOSITORY_DATASET, nrows=args.nrows)
+    print(f'{len(githubDataFrame)} GitHub rows, {len(repositoryDataFrame)} repository rows, best of {args.repeat}\n')
+
+    steps = [
+        ('Repository/user name split', lambda: split_names_before(githubDataFrame),
+         lambda: split_names_after(githubDataFrame)),
+        # The parse is part of the cost: the loader does it for every row to fill "Created At"
+        ('Year by parsing created_at', lambda: year_before(createdAt),
+         lambda: creation_year(pd.to_datetime(createdAt, format=REPOSITORY_DATE_FORMAT, errors='coerce'))),
+        ('GitHub column renames', lambda: rename_before(githubDataFrame, GITHUB_COLUMNS),
+         lambda: _rename(githubDataFrame, GITHUB_COLUMNS)),
+        ('Repository column renames', lambda: rename_before(repositoryDataFrame, REPOSITORY_COLUMNS),
+         lambda: _rename(repositoryDataFrame, REPOSITORY_COLUMNS)),
+    ]
+    print(f'{"Step":<32}{"Before (s)":>12}{"After (s)":>12}{"Speed-up":>10}')
+    for name, before, after in steps:
+        beforeSeconds, afterSeconds = best_of(before, args.repeat), best_of(after, args.repeat)
+        print(f'{name:<32}{beforeSeconds:>12.4f}{afterSeconds:>12.4f}{beforeSeconds / afterSeconds:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import itertools
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.loader import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Synthetic stand-ins for the two Kaggle CSVs, with the same columns and value formats, so the pipeline can be measured
+# at any scale without the LFS-tracked files. Counts are heavy-tailed like the real ones, some values are missing, and
+# a share of the rows are exact duplicates of earlier ones.
+
+SYNTHETIC_DIR = DATA_DIR / '.cache' / 'synthetic'
+SCALES = [10_000, 1_000_000, 10_000_000]
+# Rows generated and written at a time, so 10M rows never sit in memory at once
+BLOCK_ROWS = 500_000
+LANGUAGES = ['JavaScript', 'Python', 'Java', 'HTML', 'TypeScript', 'C#', 'PHP', 'C++', 'CSS', 'Shell', 'Jupyter Notebook',
+             'Go', 'C', 'Ruby', 'Kotlin', 'Dart', 'Swift', 'Rust', 'Vue', 'Dockerfile']
+LICENSES = ['MIT License', 'Apache License 2.0', 'Other', 'GNU General Public License v3.0', 'BSD 3-Clause "New" or '
+            '"Revised" License', 'GNU General Public License v2.0', 'The Unlicense']
+MISSING_LANGUAGE = 0.2
+MISSING_LICENSE = 0.6
+DUPLICATES = 0.02
+
+
+def _counts(rng, rows, scale, missing=0.0):
+    values = (rng.pareto(1.1, rows) * scale).astype('int64').clip(max=2 ** 31 - 2)
+    column = pd.Series(pd.array(values, dtype='Int64'))
+    column[rng.random(rows) < missing] = pd.NA
+    return column
+
+
+def _choice(rng, values, rows, missing):
+    # Earlier values are more common, like the language and licence rankings in the real data
+    weights = 1 / np.arange(1, len(values) + 1)
+    column = pd.Series(np.asarray(values, dtype=object)[rng.choice(len(values), rows, p=weights / weights.sum())])
+    column[rng.random(rows) < missing] = None
+    return column
+
+
+def _languages_used(rng, primary):
+    # Lists are drawn from a fixed pool of combinations, which keeps generation vectorised
+    pool = [str(list(combination)) for size in (1, 2, 3) for combination in itertools.combinations(LANGUAGES[:10], size)]
+    languagesUsed = pd.Series(np.asarray(pool, dtype=object)[rng.integers(0, len(pool), len(primary))])
+    return languagesUsed.where(primary.notna(), None)
+
+
+def _created_at(rng, rows):
+    start, end = np.datetime64('2008-01-01T00:00:00'), np.datetime64('2023-06-30T00:00:00')
+    seconds = rng.integers(0, (end - start).astype('int64'), rows).astype('timedelta64[s]')
+    return pd.Series(np.datetime_as_string(start + seconds, unit='s')) + 'Z'
+
+
+def _with_duplicates(rng, dataFrame):
+    copies = dataFrame.iloc[rng.integers(0, len(dataFrame), int(len(dataFrame) * DUPLICATES))]
+    return pd.concat([dataFrame, copies]).iloc[rng.permutation(len(dataFrame) + len(copies))]
+
+
+def repository_block(rng, start, rows):
+    primary = _choice(rng, LANGUAGES, rows, MISSING_LANGUAGE)
+    return _with_duplicates(rng, pd.DataFrame({
+        'name': 'repository-' + pd.Series(np.arange(start, start + rows)).astype(str),
+        'stars_count': _counts(rng, rows, 2),
+        'forks_count': _counts(rng, rows, 1),
+        'watchers': _counts(rng, rows, 1),
+        'pull_requests': _counts(rng, rows, 1),
+        'primary_language': primary,
+        'languages_used': _languages_used(rng, primary),
+        'commit_count': _counts(rng, rows, 20, missing=0.01),
+        'created_at': _created_at(rng, rows),
+        'licence': _choice(rng, LICENSES, rows, MISSING_LICENSE),
+    }))
+
+
+def github_block(rng, start, rows):
+    users = pd.Series(rng.integers(0, max(rows // 4, 1), rows)).astype(str)
+    return _with_duplicates(rng, pd.DataFrame({
+        'repositories': 'user-' + users + '/project-' + pd.Series(np.arange(start, start + rows)).astype(str),
+        'stars_count': _counts(rng, rows, 50),
+        'forks_count': _counts(rng, rows, 20),
+        'issues_count': _counts(rng, rows, 5) + 1,
+        'pull_requests': _counts(rng, rows, 2),
+        'contributors': _counts(rng, rows, 10),
+        'language': _choice(rng, LANGUAGES, rows, MISSING_LANGUAGE),
+    }))
+
+
+def _write(path, blocks):
+    temporaryPath = path.with_suffix('.tmp')
+    with open(temporaryPath, 'w', newline='') as file:
+        for index, block in enumerate(blocks):
+            block.to_csv(file, index=False, header=index == 0)
+    temporaryPath.replace(path)
+
+
+def generate(rows, directory=None, seed=0):
+    """Write ``github_dataset.csv`` and ``repository_data.csv`` of ``rows`` distinct rows each (plus duplicates).
+
+    The files go to ``<directory>/<rows>/`` and are reused if already generated. Returns that directory.
+    """
+    directory = Path(directory or SYNTHETIC_DIR) / str(rows)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, block in (('github_dataset.csv', github_block), ('repository_data.csv', repository_block)):
+        path = directory / name
+        if path.exists():
+            continue
+        rng = np.random.default_rng(seed)
+        starts = range(0, rows, BLOCK_ROWS)
+        _write(path, (block(rng, start, min(BLOCK_ROWS, rows - start)) for start in starts))
+        logger.info('Generated %s with %d rows', path, rows)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic GitHub datasets with the Kaggle schema.')
+    parser.add_argument('--rows', type=int, nargs='+', default=SCALES)
+    parser.add_argument('--directory', type=Path, default=None,
+                        help=f'parent of the <rows> directories (default {SYNTHETIC_DIR})')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    for rows in args.rows:
+        print(generate(rows, args.directory))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# Data pipeline used by app.py to load, clean and summarise the Kaggle GitHub datasets.
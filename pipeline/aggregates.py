@@ -0,0 +1,162 @@
+import logging
+import pickle
+import time
+
+import streamlit as st
+
+from pipeline import settings
+from pipeline.binning import downsample, histogram2d
+from pipeline.cleaning import NO_LANGUAGE
+from pipeline.instrumentation import stage
+from pipeline.loader import replaced_atomically
+from pipeline.store import CACHE_DIR, ensure_store, iter_batches, load_manifest, read_language_index, read_table
+from pipeline.streaming import TOP_COLUMNS, RunningAggregates, language_trend, masked_counts
+from pipeline.topk import top_k, top_k_rows
+
+logger = logging.getLogger(__name__)
+
+# Every chart on the page only depends on the static datasets, so its (small) result frame is computed once per
+# dataset fingerprint and pickled next to the columnar cache. Each registered function returns a dict of the named
+# result frames it was registered with and is only run when one of those results is first asked for. Bump
+# AGGREGATES_VERSION whenever a result changes.
+AGGREGATES = {}
+AGGREGATES_VERSION = 7
+
+
+def aggregate(*names):
+    def register(function):
+        for name in names:
+            AGGREGATES[name] = function
+        return function
+    return register
+
+
+def aggregates_path(fingerprint, function):
+    return CACHE_DIR / f'aggregates-{fingerprint}-{function.__name__}.pkl'
+
+
+@aggregate('contributions', 'github_languages', 'top:Issue Count')
+def github_aggregates():
+    githubDataFrame = read_table('github')
+    specified = (githubDataFrame['Language'] != NO_LANGUAGE).to_numpy()
+    return {
+        'contributions': top_k_rows(githubDataFrame, 'Contributors'),
+        'github_languages': masked_counts(githubDataFrame['Language'], specified)[:10],
+        'top:Issue Count': top_k(githubDataFrame, ['Issue Count'], labels=['Repository Name'], mask=specified)[
+            'Issue Count'],
+    }
+
+
+@aggregate('language_trend', 'repository_languages', 'licenses')
+def repository_counts():
+    # Folded one record batch at a time so memory stays bounded however large the repository table is
+    running = RunningAggregates(topColumns=[])
+    for batch in iter_batches('repository', running.columns):
+        running.update(batch)
+    return {
+        'language_trend': language_trend_from_counts(running.trend_counts()),
+        'repository_languages': running.language_counts()[:10],
+        'licenses': running.license_counts()[:10],
+    }
+
+
+@aggregate(*(f'top:{column}' for column in TOP_COLUMNS))
+def repository_top_rows():
+    # All five "Highest ..." top-10s come out of a single pass over the table
+    running = RunningAggregates(topColumns=TOP_COLUMNS)
+    for batch in iter_batches('repository', ['Name', 'Primary Language'] + TOP_COLUMNS):
+        running.add_top_candidates(batch, (batch['Primary Language'] != NO_LANGUAGE).to_numpy())
+    return {f'top:{column}': running.top_rows(column) for column in TOP_COLUMNS}
+
+
+@aggregate('languages_used', 'language_co_usage', 'languages_used_trend')
+def language_index_aggregates():
+    # Everything here comes from the posting lists of the inverted language index; only the Year column is read
+    index = read_language_index()
+    languagesUsed = index.counts()[:10]
+    languages = list(languagesUsed.index)
+    trend = index.trend(languages[:5], read_table('repository', ['Year'])['Year']).reset_index()
+    trend['Year'] = trend['Year'].astype(str)
+    return {
+        'languages_used': languagesUsed,
+        'language_co_usage': index.co_occurrence(languages),
+        # Omitting 2023 since does not have full year's data
+        'languages_used_trend': trend[trend['Year'] != '2023'],
+    }
+
+
+@aggregate('stars_vs_forks:bins', 'stars_vs_forks:sample')
+def repository_stars_vs_forks():
+    # Only the two plotted columns are read, and neither result grows with the number of repositories
+    repositoryDataFrame = read_table('repository', ['Star Count', 'Fork Count'])
+    return {
+        'stars_vs_forks:bins': histogram2d(repositoryDataFrame, 'Star Count', 'Fork Count'),
+        'stars_vs_forks:sample': downsample(repositoryDataFrame, 'Star Count', 'Fork Count', settings.MAX_POINTS),
+    }
+
+
+def language_trend_from_counts(lineChartDataFrame):
+    """Top 5 primary languages per year as a Year x language table, from per (Year, Primary Language) counts."""
+    lineChartDataFrame = language_trend(lineChartDataFrame)
+    # Omitting 2023 since does not have full year's data
+    return lineChartDataFrame[lineChartDataFrame['Year'] != '2023']
+
+
+def _functions():
+    return list(dict.fromkeys(AGGREGATES.values()))
+
+
+def _compute(function):
+    start = time.perf_counter()
+    with stage(f'aggregate:{function.__name__}'):
+        results = function()
+    logger.info('Computed %s in %.2fs', function.__name__, time.perf_counter() - start)
+    return results
+
+
+def compute_aggregates():
+    """Compute every registered aggregate without touching the on-disk cache."""
+    aggregates = {}
+    for function in _functions():
+        aggregates.update(_compute(function))
+    return aggregates
+
+
+def ensure_aggregates(manifest, function):
+    """Return ``function``'s results for ``manifest``'s dataset, computing and storing them on first use."""
+    path = aggregates_path(manifest['fingerprint'], function)
+    try:
+        with open(path, 'rb') as file:
+            stored = pickle.load(file)
+        if stored.get('version') == AGGREGATES_VERSION:
+            return stored['results']
+    # A damaged file, or one pickled from classes that have since changed, is recomputed
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError, TypeError,
+            ValueError):
+        pass
+    results = _compute(function)
+    with replaced_atomically(path) as temporaryPath, open(temporaryPath, 'wb') as file:
+        pickle.dump({'version': AGGREGATES_VERSION, 'results': results}, file, protocol=pickle.HIGHEST_PROTOCOL)
+    # Aggregates of older datasets are never read again
+    for stalePath in CACHE_DIR.glob('aggregates-*.pkl'):
+        if not stalePath.name.startswith(f'aggregates-{manifest["fingerprint"]}-'):
+            stalePath.unlink(missing_ok=True)
+    return results
+
+
+@st.cache_resource(show_spinner='Computing chart...')
+def _load_aggregates(functionName, fingerprint):
+    function = next(function for function in _functions() if function.__name__ == functionName)
+    return ensure_aggregates(load_manifest(), function)
+
+
+def load_aggregate(name):
+    """Small, read-only result frame of the chart ``name``; only the aggregate that produces it is computed."""
+    return _load_aggregates(AGGREGATES[name].__name__, load_manifest()['fingerprint'])[name]
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    manifest = ensure_store()
+    for function in _functions():
+        ensure_aggregates(manifest, function)
@@ -0,0 +1,85 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from pipeline.topk import top_k_positions
+
+# Server-side reduction of scatter plots. A browser chart cannot take millions of points, so the repository dataset is
+# either binned into a 2D histogram (drawn as an image) or downsampled to at most a fixed number of points.
+
+DEFAULT_BINS = 64
+# Points above this quantile of either axis are outliers, which a downsample keeps before anything else
+OUTLIER_QUANTILE = 0.999
+
+
+class Histogram2D(NamedTuple):
+    counts: np.ndarray
+    xEdges: np.ndarray
+    yEdges: np.ndarray
+
+
+def _valid(dataFrame, x, y):
+    xValues = dataFrame[x].to_numpy(dtype='float64', na_value=np.nan)
+    yValues = dataFrame[y].to_numpy(dtype='float64', na_value=np.nan)
+    valid = ~(np.isnan(xValues) | np.isnan(yValues))
+    return xValues, yValues, valid
+
+
+def log_edges(values, bins):
+    """``bins + 1`` edges evenly spaced in log(1 + value), so heavy-tailed counts do not all fall in the first bin."""
+    top = values.max() if len(values) else 1.0
+    edges = np.expm1(np.linspace(0, np.log1p(max(top, 1e-9)), bins + 1))
+    # expm1(log1p(top)) can round below top, which would drop the largest value from the last bin
+    edges[-1] = max(edges[-1], top)
+    return edges
+
+
+def histogram2d(dataFrame, x, y, bins=DEFAULT_BINS):
+    """Count rows of ``dataFrame`` per (``x``, ``y``) bin, on log-spaced edges; rows missing either value are left out."""
+    xValues, yValues, valid = _valid(dataFrame, x, y)
+    xValues, yValues = xValues[valid], yValues[valid]
+    xEdges, yEdges = log_edges(xValues, bins), log_edges(yValues, bins)
+    counts, _, _ = np.histogram2d(xValues, yValues, bins=[xEdges, yEdges])
+    return Histogram2D(counts.astype(np.int64), xEdges, yEdges)
+
+
+def downsample(dataFrame, x, y, limit, bins=DEFAULT_BINS // 2, seed=0):
+    """At most ``limit`` rows of ``dataFrame[[x, y]]``, chosen so the sample still shows the shape of the data.
+
+    Outliers (above ``OUTLIER_QUANTILE`` on either axis) are kept first, up to half of ``limit``, most extreme first.
+    The rest of the budget is spread over the cells of a log-spaced 2D grid in proportion to how many rows fall in each
+    cell, with at least one row per non-empty cell, so sparse regions do not vanish. Rows keep their original order.
+    """
+    dataFrame = dataFrame[[x, y]]
+    if len(dataFrame) <= limit:
+        return dataFrame
+    xValues, yValues, valid = _valid(dataFrame, x, y)
+    positions = np.flatnonzero(valid)
+    if not len(positions):
+        # No row has both values, so there is nothing to plot (and no quantiles to take)
+        return dataFrame.iloc[positions]
+    xValues, yValues = xValues[valid], yValues[valid]
+
+    outlier = (xValues > np.quantile(xValues, OUTLIER_QUANTILE)) | (yValues > np.quantile(yValues, OUTLIER_QUANTILE))
+    outliers = np.flatnonzero(outlier)
+    if len(outliers) > limit // 2:
+        extremeness = np.maximum(xValues[outliers] / max(xValues.max(), 1), yValues[outliers] / max(yValues.max(), 1))
+        outliers = outliers[top_k_positions(extremeness, limit // 2)]
+    budget = limit - len(outliers)
+
+    rest = np.flatnonzero(~outlier)
+    xBins = np.digitize(xValues[rest], log_edges(xValues[rest], bins)[1:-1])
+    yBins = np.digitize(yValues[rest], log_edges(yValues[rest], bins)[1:-1])
+    cells = xBins * bins + yBins
+    cellCounts = np.bincount(cells, minlength=bins * bins)
+    quotas = np.maximum(np.floor(budget * cellCounts / max(len(rest), 1)), cellCounts > 0)
+
+    # A random order, then the first ``quota`` rows of every cell in that order; trim to the budget if the minimum of
+    # one row per cell overshot it
+    order = np.random.default_rng(seed).permutation(len(rest))
+    ranks = pd.Series(cells[order]).groupby(cells[order]).cumcount().to_numpy()
+    sampled = order[ranks < quotas[cells[order]]][:budget]
+
+    kept = np.sort(np.concatenate([positions[outliers], positions[rest[sampled]]]))
+    return dataFrame.iloc[kept]
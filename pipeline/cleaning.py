@@ -0,0 +1,34 @@
+import pandas as pd
+
+from pipeline.instrumentation import stage, timed
+
+NO_LANGUAGE = 'No language specified'
+
+
+def _fill_language(column):
+    # Categorical columns only accept values that are already categories
+    if isinstance(column.dtype, pd.CategoricalDtype) and NO_LANGUAGE not in column.cat.categories:
+        column = column.cat.add_categories(NO_LANGUAGE)
+    return column.fillna(NO_LANGUAGE)
+
+
+@timed('clean:github')
+def clean_github_data(githubDataFrame):
+    githubDataFrame = githubDataFrame.assign(language=_fill_language(githubDataFrame.language))
+    with stage('clean:drop_duplicates', rows=len(githubDataFrame)):
+        return githubDataFrame.drop_duplicates()
+
+
+@timed('clean:fill_languages')
+def fill_repository_languages(repositoryDataFrame):
+    return repositoryDataFrame.assign(
+        primary_language=_fill_language(repositoryDataFrame.primary_language),
+        languages_used=_fill_language(repositoryDataFrame.languages_used),
+    )
+
+
+@timed('clean:repository')
+def clean_repository_data(repositoryDataFrame):
+    repositoryDataFrame = fill_repository_languages(repositoryDataFrame)
+    with stage('clean:drop_duplicates', rows=len(repositoryDataFrame)):
+        return repositoryDataFrame.drop_duplicates()
@@ -0,0 +1,159 @@
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.cleaning import NO_LANGUAGE, clean_repository_data
+from pipeline.instrumentation import timed
+from pipeline.loader import REPOSITORY_DATASET, parse_repository_dates, read_repository_csv, replaced_atomically
+from pipeline.preparation import prepare_repository_data
+
+logger = logging.getLogger(__name__)
+
+# Compaction of the cleaned repository frame: low-cardinality text becomes categorical, integer counts get the
+# narrowest dtype that holds them, and "Languages Used" is replaced by dictionary-encoded offset arrays.
+
+# Object columns with at most this share of distinct values are stored as categoricals
+CATEGORY_RATIO = 0.5
+INTEGER_DTYPES = ['UInt8', 'UInt16', 'UInt32', 'Int8', 'Int16', 'Int32', 'Int64']
+
+
+class LanguageLists:
+    """The languages of every repository, dictionary encoded.
+
+    Repository ``i`` uses ``vocabulary[codes[offsets[i]:offsets[i + 1]]]``. With a few hundred distinct languages this
+    takes 2 bytes per language plus 8 bytes per repository, instead of a Python string per repository.
+    """
+
+    def __init__(self, vocabulary, codes, offsets):
+        self.vocabulary = list(vocabulary)
+        self.codes = codes
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.offsets.nbytes
+
+    @classmethod
+    def from_strings(cls, column, vocabulary=()):
+        """Encode strings such as ``"['Python', 'Shell']"``; languages not in ``vocabulary`` are appended to it."""
+        column = column.reset_index(drop=True)
+        # Anything that is not a list, such as the "No language specified" filler, is an empty list
+        lists = column.where(column.str.startswith('[', na=False), '[]').str.slice(1, -1)
+        languages = lists.str.split(', ').explode()
+        languages = languages[languages.str.len() > 0].str.slice(1, -1)
+
+        vocabulary = list(vocabulary)
+        known = set(vocabulary)
+        vocabulary += [language for language in languages.unique() if language not in known]
+        codes = pd.Categorical(languages, categories=vocabulary).codes.astype(np.int16)
+        offsets = np.zeros(len(column) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(languages.index.to_numpy(dtype=np.int64), minlength=len(column)), out=offsets[1:])
+        return cls(vocabulary, codes, offsets)
+
+    @classmethod
+    def concatenate(cls, parts):
+        """Join encodings built one after another, each reusing the previous part's vocabulary."""
+        parts = list(parts)
+        if not parts:
+            return cls([], np.empty(0, dtype=np.int16), np.zeros(1, dtype=np.int64))
+        offsets = [parts[0].offsets]
+        for part in parts[1:]:
+            offsets.append(part.offsets[1:] + offsets[-1][-1])
+        return cls(parts[-1].vocabulary, np.concatenate([part.codes for part in parts]), np.concatenate(offsets))
+
+    def to_strings(self, rows=None):
+        """Decode back to the original ``"['Python', 'Shell']"`` strings for the first ``rows`` repositories."""
+        rows = len(self) if rows is None else min(rows, len(self))
+        strings = []
+        for row in range(rows):
+            codes = self.codes[self.offsets[row]:self.offsets[row + 1]]
+            strings.append(str([self.vocabulary[code] for code in codes]) if len(codes) else NO_LANGUAGE)
+        return pd.Series(strings, dtype=object)
+
+    def save(self, directory):
+        # Files are replaced rather than overwritten, so arrays another process has memory-mapped stay intact
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in (('codes.npy', self.codes), ('offsets.npy', self.offsets)):
+            with replaced_atomically(directory / name) as temporaryPath, open(temporaryPath, 'wb') as file:
+                np.save(file, array)
+        with replaced_atomically(directory / 'vocabulary.json') as temporaryPath:
+            temporaryPath.write_text(json.dumps(self.vocabulary))
+
+    @classmethod
+    def load(cls, directory):
+        """Load arrays written by ``save``, memory-mapped rather than read into memory."""
+        directory = Path(directory)
+        return cls(json.loads((directory / 'vocabulary.json').read_text()),
+                   np.load(directory / 'codes.npy', mmap_mode='r'), np.load(directory / 'offsets.npy', mmap_mode='r'))
+
+
+def narrowest_integer_dtype(column):
+    values = column.dropna()
+    if values.empty:
+        return 'UInt8'
+    low, high = values.min(), values.max()
+    return next(dtype for dtype in INTEGER_DTYPES
+                if np.iinfo(dtype.lower()).min <= low and high <= np.iinfo(dtype.lower()).max)
+
+
+def compact(dataFrame, downcast=True):
+    """Return ``dataFrame`` with categorical text columns and, if ``downcast``, the narrowest integer dtypes.
+
+    ``downcast`` looks at the values, so leave it off for frames that are written chunk by chunk into one table, where
+    every chunk must end up with the same dtypes.
+    """
+    dtypes = {}
+    for column, dtype in dataFrame.dtypes.items():
+        if dtype == object and dataFrame[column].nunique() <= CATEGORY_RATIO * len(dataFrame):
+            dtypes[column] = 'category'
+        elif downcast and pd.api.types.is_integer_dtype(dtype):
+            dtypes[column] = narrowest_integer_dtype(dataFrame[column])
+    return dataFrame.astype(dtypes)
+
+
+@timed('compact:repository')
+def compact_repository_data(repositoryDataFrame, vocabulary=(), downcast=True):
+    """Split the cleaned repository frame into a compacted frame without "Languages Used" and its ``LanguageLists``."""
+    languages = LanguageLists.from_strings(repositoryDataFrame['Languages Used'], vocabulary)
+    return compact(repositoryDataFrame.drop(columns=['Languages Used']), downcast), languages
+
+
+def bytes_per_row(dataFrame, *arrays):
+    return (dataFrame.memory_usage(index=False, deep=True).sum() + sum(array.nbytes for array in arrays)) / max(
+        len(dataFrame), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report bytes per row of the cleaned repository frame before and '
+                                                 'after compaction.')
+    parser.add_argument('path', nargs='?', default=REPOSITORY_DATASET, type=Path)
+    parser.add_argument('--nrows', type=int, default=None)
+    args = parser.parse_args()
+
+    # "Before" is the frame app.py used to build: default read_csv dtypes (float64 counts, object text), cleaned and
+    # prepared; only created_at is parsed, which preparation needs. "After" is what the store writes: the loader's
+    # dtypes, cleaned, prepared and compacted
+    repositoryDataFrame = pd.read_csv(args.path, nrows=args.nrows)
+    repositoryDataFrame = prepare_repository_data(clean_repository_data(parse_repository_dates(repositoryDataFrame)))
+    compacted, languages = compact_repository_data(
+        prepare_repository_data(clean_repository_data(read_repository_csv(args.path, nrows=args.nrows))))
+    print(f'{len(repositoryDataFrame)} rows')
+    print(f'{"Column":<20}{"Before (B/row)":>16}{"After (B/row)":>16}')
+    before = repositoryDataFrame.memory_usage(index=False, deep=True) / len(repositoryDataFrame)
+    after = compacted.memory_usage(index=False, deep=True) / len(compacted)
+    after['Languages Used'] = languages.nbytes / len(compacted)
+    for column in repositoryDataFrame.columns:
+        print(f'{column:<20}{before[column]:>16.1f}{after[column]:>16.1f}')
+    print(f'{"Total":<20}{bytes_per_row(repositoryDataFrame):>16.1f}{bytes_per_row(compacted, languages):>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import hashlib
+import io
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.instrumentation import stage
+from pipeline.loader import (DATA_DIR, REPOSITORY_DATASET, REPOSITORY_DATE_COLUMNS, REPOSITORY_DATE_FORMAT,
+                             REPOSITORY_DTYPES, parse_repository_dates)
+from pipeline.streaming import (DEFAULT_CHUNK_SIZE, TOP_COLUMNS, HashedRowSet, RunningAggregates, clean_chunks,
+                                deduplicate_hashed)
+
+logger = logging.getLogger(__name__)
+
+# Incremental refresh of the repository aggregates for a CSV that only ever grows at the end. The state kept between
+# runs is the byte offset up to which the file has been processed, a fingerprint of the processed bytes, the hashes of
+# every distinct row so far and the running aggregates. A refresh checks the fingerprint, reads only the bytes after
+# the offset, drops rows already in the hash set and folds the rest into the aggregates, so its cost grows with the
+# appended rows rather than with the file. If the processed part changed (the file was truncated or rewritten) the
+# state is rebuilt from the start of the file. The fingerprint covers the first and the last FINGERPRINT_BYTES before
+# the offset (header and last processed rows included), so an edit confined to the middle of a large file goes
+# unnoticed; refresh with force=True after such a change. pipeline/store.py recognises appends to the CSV it cached by
+# the same fingerprint and parses them with tail_chunks.
+
+# Offset, fingerprints, row hashes and aggregates are pickled together, so they can only ever be replaced as a whole
+STATE = DATA_DIR / '.cache' / 'incremental.pkl'
+# Bump whenever the stored state changes shape
+STATE_VERSION = 1
+BLOCK_SIZE = 1 << 16
+FINGERPRINT_BYTES = 1 << 16
+# One refresh at a time per process, e.g. across the sessions of a Streamlit server. Separate processes each write
+# through their own temporary file, so they cannot corrupt the state either; the last one to finish wins
+_lock = threading.Lock()
+
+
+class _Tail(io.RawIOBase):
+    """Read-only stream of ``header`` followed by ``file`` from its current position up to byte ``end``."""
+
+    def __init__(self, file, header, end):
+        self.file = file
+        self.pending = header
+        self.remaining = end - file.tell()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.pending:
+            data, self.pending = self.pending[:len(buffer)], self.pending[len(buffer):]
+        else:
+            data = self.file.read(min(len(buffer), self.remaining))
+            self.remaining -= len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _complete_end(file, start):
+    """Offset just past the last newline of ``file`` at or after ``start`` (``start`` if there is none)."""
+    end = os.fstat(file.fileno()).st_size
+    while end > start:
+        window = min(end - start, BLOCK_SIZE)
+        file.seek(end - window)
+        newline = file.read(window).rfind(b'\n')
+        if newline >= 0:
+            return end - window + newline + 1
+        end -= window
+    return start
+
+
+def prefix_fingerprint(file, offset):
+    """Digest of the first and the last ``FINGERPRINT_BYTES`` of ``file`` before byte ``offset``."""
+    digest = hashlib.sha256(str(offset).encode())
+    for start in (0, max(offset - FINGERPRINT_BYTES, 0)):
+        file.seek(start)
+        digest.update(file.read(min(FINGERPRINT_BYTES, offset - start)))
+    return digest.hexdigest()
+
+
+def read_state(statePath=STATE):
+    """The stored ``(state, rowSet, running)``, or None if there is none or it was written by another version."""
+    try:
+        with open(statePath, 'rb') as file:
+            stored = pickle.load(file)
+        if stored['state'].get('version') != STATE_VERSION:
+            return None
+        return stored['state'], HashedRowSet(stored['hashes']), stored['running']
+    # A damaged file, or one pickled from classes that have since changed, is the same as no state at all
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError, TypeError,
+            ValueError):
+        return None
+
+
+def write_state(state, rowSet, running, statePath=STATE):
+    statePath = Path(statePath)
+    statePath.parent.mkdir(parents=True, exist_ok=True)
+    # A name of its own, so that two writers never interleave their bytes in one temporary file
+    with tempfile.NamedTemporaryFile(dir=statePath.parent, prefix=statePath.stem, suffix='.tmp', delete=False) as file:
+        try:
+            pickle.dump({'state': state, 'hashes': rowSet.hashes, 'running': running}, file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            file.close()
+            os.unlink(file.name)
+            raise
+    os.replace(file.name, statePath)
+
+
+def _is_continuation(state, file, path):
+    """Whether ``file`` still starts with the bytes processed so far, judged by their fingerprint."""
+    if state['path'] != str(Path(path).absolute()) or os.fstat(file.fileno()).st_size < state['offset']:
+        return False
+    return prefix_fingerprint(file, state['offset']) == state['fingerprint']
+
+
+def tail_chunks(file, header, end, chunksize):
+    """Typed chunks of the CSV rows of ``file`` from its current position up to byte ``end``, read under ``header``."""
+    tail = io.BufferedReader(_Tail(file, header, end))
+    with pd.read_csv(tail, dtype=REPOSITORY_DTYPES, parse_dates=REPOSITORY_DATE_COLUMNS,
+                     date_format=REPOSITORY_DATE_FORMAT, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield parse_repository_dates(chunk)
+
+
+def refresh(path=REPOSITORY_DATASET, chunksize=DEFAULT_CHUNK_SIZE, topColumns=TOP_COLUMNS, k=10, force=False,
+            statePath=STATE):
+    """Bring the stored aggregates of ``path`` up to date and return them as a ``RunningAggregates``.
+
+    Only complete lines are processed; a last line still being written is picked up by the next refresh. The state
+    is kept in ``statePath``, one file per CSV.
+    """
+    with _lock:
+        return _refresh(path, chunksize, topColumns, k, force, statePath)
+
+
+def _refresh(path, chunksize, topColumns, k, force, statePath):
+    start = time.perf_counter()
+    stored = None if force else read_state(statePath)
+    with open(path, 'rb') as file:
+        running = stored[2] if stored is not None else None
+        if (stored is not None and _is_continuation(stored[0], file, path)
+                and (running.topColumns, running.k) == (list(topColumns), k)):
+            state, rowSet, running = stored
+            mode = 'incremental'
+        else:
+            state, rowSet, running = None, HashedRowSet(), RunningAggregates(topColumns, k)
+            mode = 'full'
+        file.seek(0)
+        header = file.readline()
+        offset = state['offset'] if state is not None else len(header)
+        # A trailing partial line is left for the next refresh
+        end = _complete_end(file, offset)
+
+        with stage(f'refresh:{mode}', bytes=end - offset) as details:
+            distinctRows = 0
+            if end > offset:
+                file.seek(offset)
+                for chunk in deduplicate_hashed(clean_chunks(tail_chunks(file, header, end, chunksize)), rowSet):
+                    distinctRows += len(chunk)
+                    running.update(chunk)
+            details['distinctRows'] = distinctRows
+        fingerprint = prefix_fingerprint(file, end)
+
+    write_state({
+        'version': STATE_VERSION,
+        'path': str(Path(path).absolute()),
+        'offset': end,
+        'fingerprint': fingerprint,
+        'rows': running.rows,
+    }, rowSet, running, statePath)
+    logger.info('Refreshed %s (%s): %d new bytes, %d new distinct rows of %d in %.2fs', Path(path).name, mode,
+                end - offset, distinctRows, running.rows, time.perf_counter() - start)
+    return running
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fold rows appended to repository_data.csv into the stored '
+                                                 'aggregates.')
+    parser.add_argument('path', nargs='?', default=REPOSITORY_DATASET, type=Path)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--force', action='store_true', help='ignore the stored state and process the whole file')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    running = refresh(args.path, args.chunksize, force=args.force)
+    print(running.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import collections
+import contextlib
+import functools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Lightweight per-stage instrumentation. ``stage`` (a context manager) and ``timed`` (a decorator) record wall time, the
+# resident set size when the stage started, and the peak RSS sampled while it ran. Records are kept per process, so a
+# Streamlit server collects the stages of every session; cached stages only show up the time they actually run.
+
+# Seconds between RSS samples; a stage shorter than this reports its starting RSS as its peak
+SAMPLE_INTERVAL = 0.01
+# Most recent records kept; older ones are dropped
+MAX_RECORDS = 1000
+
+_records = collections.deque(maxlen=MAX_RECORDS)
+_active = []
+_lock = threading.Lock()
+# Signalled when a stage starts, so the sampler only wakes up while there is something to sample
+_started = threading.Condition(_lock)
+_sampler = None
+_local = threading.local()
+
+
+def current_rss():
+    """Resident set size of this process in bytes; the lifetime peak where the current value is not available."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _sample():
+    while True:
+        with _started:
+            _started.wait_for(lambda: _active)
+        time.sleep(SAMPLE_INTERVAL)
+        with _lock:
+            if not _active:
+                continue
+            rss = current_rss()
+            for record in _active:
+                record['peakRss'] = max(record['peakRss'], rss)
+
+
+def _start_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample, name='rss-sampler', daemon=True)
+            _sampler.start()
+
+
+@contextlib.contextmanager
+def stage(name, **details):
+    """Record the wall time and peak RSS of the enclosed block as stage ``name``.
+
+    Stages nest: a stage started inside another is recorded with its parent's name, which the panel shows next to it.
+    ``details`` (e.g. a row count) are stored with the record; the block may add more through the yielded dict.
+    """
+    _start_sampler()
+    parents = getattr(_local, 'stages', [])
+    rss = current_rss()
+    record = {'stage': name, 'parent': parents[-1]['stage'] if parents else None,
+              'started': datetime.now(timezone.utc).isoformat(timespec='milliseconds'), 'seconds': None,
+              'startRss': rss, 'peakRss': rss, 'details': dict(details)}
+    _local.stages = parents + [record]
+    with _lock:
+        _active.append(record)
+        _started.notify()
+    start = time.perf_counter()
+    try:
+        yield record['details']
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        with _lock:
+            _active.remove(record)
+            record['peakRss'] = max(record['peakRss'], current_rss())
+            _records.append(record)
+        _local.stages = parents
+
+
+def timed(name=None):
+    """Decorator recording every call of the function as a ``stage`` (default name: the function's name)."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name or function.__name__):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def clear():
+    with _lock:
+        _records.clear()
+
+
+def records_frame():
+    """Recorded stages, oldest first, with RSS in MiB."""
+    frame = pd.DataFrame(records(), columns=['stage', 'parent', 'started', 'seconds', 'startRss', 'peakRss', 'details'])
+    frame['Start RSS (MiB)'] = frame.pop('startRss') / 2 ** 20
+    frame['Peak RSS (MiB)'] = frame.pop('peakRss') / 2 ** 20
+    return frame
+
+
+def export_json(path=None):
+    """All records plus host and library versions as JSON, written to ``path`` if given; returns the JSON text."""
+    text = json.dumps({
+        'exported': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'versions': {'pandas': pd.__version__, 'numpy': np.__version__, 'pyarrow': pa.__version__},
+        'stages': records(),
+    }, indent=2, default=str)
+    if path is not None:
+        with open(path, 'w') as file:
+            file.write(text)
+    return text
@@ -0,0 +1,118 @@
+import json
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.loader import replaced_atomically
+
+# Inverted index over "Languages Used": for every language, the sorted row ids of the repositories that use it. Counts
+# are posting-list lengths, co-usage is the size of an intersection of two sorted lists, and per-year trends gather
+# the Year column at a language's row ids, so none of them touches a string once the index is built.
+
+
+class LanguageIndex:
+    """Posting lists in CSR form: repositories using ``vocabulary[j]`` are ``rows[offsets[j]:offsets[j + 1]]``."""
+
+    def __init__(self, vocabulary, offsets, rows):
+        self.vocabulary = list(vocabulary)
+        self.offsets = offsets
+        self.rows = rows
+        self._codes = {language: code for code, language in enumerate(self.vocabulary)}
+
+    @classmethod
+    def from_language_lists(cls, languageLists):
+        """Invert ``compaction.LanguageLists`` (row -> language codes) into language -> row ids."""
+        rowCount = len(languageLists)
+        codes = np.asarray(languageLists.codes, dtype=np.int64)
+        rowIds = np.repeat(np.arange(rowCount, dtype=np.int64), np.diff(languageLists.offsets))
+        # One entry per (language, repository), ordered by language and then by row id
+        pairs = np.unique(codes * max(rowCount, 1) + rowIds)
+        pairCodes, pairRows = np.divmod(pairs, max(rowCount, 1))
+        offsets = np.zeros(len(languageLists.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairCodes, minlength=len(languageLists.vocabulary)), out=offsets[1:])
+        return cls(languageLists.vocabulary, offsets, pairRows.astype(np.int32))
+
+    def extended(self, languageLists, start):
+        """The index with the rows of ``languageLists`` added as row ids ``start`` onwards.
+
+        ``languageLists`` must use this index's vocabulary, possibly with new languages at the end, as
+        ``LanguageLists.from_strings`` leaves it. Every posting list keeps its rows and gets the new ones behind them,
+        so the lists stay sorted without inverting the old rows again.
+        """
+        added = LanguageIndex.from_language_lists(languageLists)
+        oldCounts = np.zeros(len(added.vocabulary), dtype=np.int64)
+        oldCounts[:len(self.vocabulary)] = np.diff(self.offsets)
+        newCounts = np.diff(added.offsets)
+        offsets = np.zeros(len(added.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(oldCounts + newCounts, out=offsets[1:])
+        # Each list moves to its new start; the added rows follow the old rows of the same language
+        oldStarts = np.zeros(len(added.vocabulary), dtype=np.int64)
+        oldStarts[:len(self.vocabulary)] = self.offsets[:-1]
+        rows = np.empty(offsets[-1], dtype=np.int32)
+        rows[np.arange(len(self.rows)) + np.repeat(offsets[:-1] - oldStarts, oldCounts)] = self.rows
+        rows[np.arange(len(added.rows)) + np.repeat(offsets[:-1] + oldCounts - added.offsets[:-1], newCounts)] = (
+            added.rows + start)
+        return LanguageIndex(added.vocabulary, offsets, rows)
+
+    def __contains__(self, language):
+        return language in self._codes
+
+    def repositories(self, language):
+        """Sorted row ids of the repositories using ``language`` (empty if no repository does)."""
+        code = self._codes.get(language)
+        if code is None:
+            return self.rows[:0]
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+    def intersection(self, *languages):
+        """Sorted row ids of the repositories using all of ``languages``; the shortest lists are intersected first."""
+        postings = sorted((self.repositories(language) for language in languages), key=len)
+        rows = postings[0]
+        for posting in postings[1:]:
+            rows = np.intersect1d(rows, posting, assume_unique=True)
+        return rows
+
+    def counts(self):
+        """Repositories using each language, most used first (ties in vocabulary order)."""
+        counts = pd.Series(np.diff(self.offsets), index=pd.Index(self.vocabulary, name='Language'), name='count')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def co_occurrence(self, languages):
+        """Symmetric frame of how many repositories use both languages; the diagonal is the per-language count."""
+        matrix = pd.DataFrame(0, index=pd.Index(languages, name='Language'), columns=list(languages), dtype='int64')
+        for language in languages:
+            matrix.loc[language, language] = len(self.repositories(language))
+        for first, second in combinations(languages, 2):
+            matrix.loc[first, second] = matrix.loc[second, first] = len(self.intersection(first, second))
+        return matrix
+
+    def trend(self, languages, years):
+        """Repositories using each of ``languages`` per value of ``years`` (one entry per row id), as Year x language."""
+        years = pd.Series(years)
+        trend = {}
+        for language in languages:
+            trend[language] = years.iloc[self.repositories(language)].value_counts()
+        return pd.DataFrame(trend).rename_axis('Year').sort_index().fillna(0).astype('int64')
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.rows.nbytes
+
+    def save(self, directory):
+        # Files are replaced rather than overwritten, so arrays another process has memory-mapped stay intact
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in (('offsets.npy', self.offsets), ('rows.npy', self.rows)):
+            with replaced_atomically(directory / name) as temporaryPath, open(temporaryPath, 'wb') as file:
+                np.save(file, array)
+        with replaced_atomically(directory / 'vocabulary.json') as temporaryPath:
+            temporaryPath.write_text(json.dumps(self.vocabulary))
+
+    @classmethod
+    def load(cls, directory):
+        """Load arrays written by ``save``, memory-mapped rather than read into memory."""
+        directory = Path(directory)
+        return cls(json.loads((directory / 'vocabulary.json').read_text()),
+                   np.load(directory / 'offsets.npy', mmap_mode='r'), np.load(directory / 'rows.npy', mmap_mode='r'))
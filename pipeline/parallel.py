@@ -0,0 +1,154 @@
+import argparse
+import io
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline import settings
+from pipeline.cleaning import NO_LANGUAGE
+from pipeline.loader import (REPOSITORY_DATASET, REPOSITORY_DATE_COLUMNS, REPOSITORY_DATE_FORMAT,
+                             REPOSITORY_DTYPES, parse_repository_dates)
+from pipeline.streaming import TOP_COLUMNS, RunningAggregates, clean_chunks, row_hashes
+from pipeline.topk import top_k_rows
+
+logger = logging.getLogger(__name__)
+
+# Parallel engine for repository_data.csv. The file is split into byte ranges at line boundaries; every worker
+# process parses, cleans and pre-aggregates its own range, and the parent merges the partial results.
+#
+# Duplicate rows can sit in different ranges, so workers cannot drop them on their own. Instead each worker returns
+# the 64-bit hash of every distinct row in its range plus the code of that row's (Year, Primary Language, License,
+# has stars) group. The parent keeps the first occurrence of every hash in file order - the same rule as
+# streaming.deduplicate_hashed - and counts the surviving group codes, which gives exactly the serial counts.
+# Ranges must not split a quoted field across lines, which holds for the Kaggle export.
+
+KEY_COLUMNS = ['Year', 'Primary Language', 'License', 'Has Stars']
+# More ranges than workers, so a slow range does not leave the other cores idle
+RANGES_PER_WORKER = 4
+
+
+def worker_count(workers=None):
+    return workers or settings.WORKERS or os.cpu_count() or 1
+
+
+def line_ranges(path, parts):
+    """Split ``path`` after its header line into at most ``parts`` byte ranges that start at a line boundary."""
+    with open(path, 'rb') as file:
+        header = file.readline()
+        dataStart = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        boundaries = [dataStart]
+        for part in range(1, parts):
+            # Back up one byte so an offset that already is a line start keeps that line
+            file.seek(max(dataStart + (size - dataStart) * part // parts - 1, dataStart))
+            file.readline()
+            if boundaries[-1] < file.tell() < size:
+                boundaries.append(file.tell())
+    boundaries.append(size)
+    return header, list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _read_range(path, header, start, end):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    return parse_repository_dates(pd.read_csv(io.BytesIO(header + data), dtype=REPOSITORY_DTYPES,
+                                              parse_dates=REPOSITORY_DATE_COLUMNS, date_format=REPOSITORY_DATE_FORMAT))
+
+
+def _aggregate_range(path, header, start, end, topColumns, k):
+    """Worker: parse, clean and pre-aggregate one byte range of the CSV."""
+    chunk = _read_range(path, header, start, end)
+    rawRows = len(chunk)
+    chunk = next(clean_chunks([chunk]))
+    hashes = row_hashes(chunk)
+    first = ~pd.Series(hashes).duplicated().to_numpy()
+    chunk, hashes = chunk[first], hashes[first]
+
+    keys = chunk[KEY_COLUMNS[:-1]].assign(**{'Has Stars': chunk['Star Count'].notna()})
+    keys = keys.astype({'Primary Language': object, 'License': object})
+    # With sort=False groups are numbered in order of first appearance, the same order drop_duplicates keeps
+    codes = keys.groupby(KEY_COLUMNS, dropna=False, sort=False).ngroup().to_numpy()
+    keyTable = keys.drop_duplicates().reset_index(drop=True)
+
+    top = {}
+    if topColumns:
+        # Local top-k of the distinct rows in this range, with their hashes so the parent can drop cross-range copies
+        specified = (chunk['Primary Language'] != NO_LANGUAGE).to_numpy()
+        candidates = chunk[['Name'] + topColumns].assign(Hash=hashes)
+        top = {column: top_k_rows(candidates, column, k, specified) for column in topColumns}
+    return {'rawRows': rawRows, 'hashes': hashes, 'codes': codes, 'keyTable': keyTable, 'top': top}
+
+
+def _merge(partials, topColumns, k):
+    # Map every range's group codes onto one global key table
+    keyTables = pd.concat([partial['keyTable'] for partial in partials], ignore_index=True)
+    globalCodes = keyTables.groupby(KEY_COLUMNS, dropna=False, sort=False).ngroup().to_numpy()
+    globalKeys = keyTables.drop_duplicates().reset_index(drop=True)
+    codes = []
+    offset = 0
+    for partial in partials:
+        codes.append(globalCodes[offset:offset + len(partial['keyTable'])][partial['codes']])
+        offset += len(partial['keyTable'])
+
+    hashes = np.concatenate([partial['hashes'] for partial in partials])
+    first = ~pd.Series(hashes).duplicated().to_numpy()
+    globalKeys['count'] = np.bincount(np.concatenate(codes)[first], minlength=len(globalKeys))
+
+    specified = globalKeys[globalKeys['Primary Language'] != NO_LANGUAGE]
+    running = RunningAggregates(topColumns, k)
+    running.add_counts(
+        int(first.sum()),
+        globalKeys[globalKeys['Has Stars']].groupby(['Year', 'Primary Language'])['count'].sum(),
+        specified.groupby('Primary Language')['count'].sum(),
+        specified.groupby('License')['count'].sum(),
+    )
+    if topColumns:
+        # add_top_candidates folds into every top column, so it gets the union of all local top-ks in a single call.
+        # Each range's rows keep their order within the range and ranges follow each other in file order; copies of a
+        # row seen earlier are dropped. Ties then resolve the same way as in the serial fold
+        candidates = pd.concat([_in_range_order(partial['top'].values()) for partial in partials], ignore_index=True)
+        running.add_top_candidates(candidates.drop_duplicates('Hash').drop(columns='Hash'))
+    return running, sum(partial['rawRows'] for partial in partials)
+
+
+def _in_range_order(tops):
+    # Local top-ks of one range keep the range's row labels, which give back the rows' order in the range
+    candidates = pd.concat(tops)
+    return candidates[~candidates.index.duplicated()].sort_index()
+
+
+def parallel_aggregates(path=REPOSITORY_DATASET, workers=None, topColumns=TOP_COLUMNS, k=10):
+    """Aggregate the repository CSV on ``workers`` processes; the result equals ``streaming.stream_aggregates``."""
+    start = time.perf_counter()
+    workers = worker_count(workers)
+    topColumns = list(topColumns)
+    header, ranges = line_ranges(path, workers * RANGES_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_aggregate_range, str(path), header, rangeStart, rangeEnd, topColumns, k)
+                   for rangeStart, rangeEnd in ranges]
+        partials = [future.result() for future in futures]
+    running, rawRows = _merge(partials, topColumns, k)
+    logger.info('Aggregated %s: %d rows (%d distinct) in %d ranges on %d workers in %.2fs', Path(path).name, rawRows,
+                running.rows, len(ranges), workers, time.perf_counter() - start)
+    return running
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate repository_data.csv on several processes.')
+    parser.add_argument('path', nargs='?', default=REPOSITORY_DATASET, type=Path)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: BEACON_WORKERS or all '
+                                                                 'cores)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    running = parallel_aggregates(args.path, args.workers)
+    print(running.report())
+
+
+if __name__ == '__main__':
+    main()
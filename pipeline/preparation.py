@@ -0,0 +1,33 @@
+import pandas as pd
+
+from pipeline.instrumentation import timed
+
+GITHUB_COLUMNS = ['Repository Name', 'User Name', 'Star Count', 'Fork Count', 'Issue Count', 'Pull Requests',
+                  'Contributors', 'Language']
+REPOSITORY_COLUMNS = ['Name', 'Star Count', 'Fork Count', 'Watchers', 'Pull Requests', 'Primary Language',
+                      'Languages Used', 'Commit Count', 'Created At', 'License']
+
+
+def _rename(dataFrame, newColumns):
+    # Columns are renamed by position, so the 'licence'/'license' spelling of the source column does not matter
+    return dataFrame.rename(columns=dict(zip(dataFrame.columns, newColumns)))
+
+
+def creation_year(createdAt):
+    """Year of each ``Created At`` value as a nullable Int16 column; the loader always parses the column."""
+    return createdAt.dt.year.astype('Int16')
+
+
+@timed('prepare:github')
+def prepare_github_data(githubDataFrame):
+    # One vectorised pass splits "user/repository" instead of two str.split calls that build a list per row
+    parts = githubDataFrame['repositories'].str.partition('/')
+    githubDataFrame = pd.concat([parts[2], parts[0], githubDataFrame.drop(columns=['repositories'])], axis=1)
+    return _rename(githubDataFrame, GITHUB_COLUMNS)
+
+
+@timed('prepare:repository')
+def prepare_repository_data(repositoryDataFrame):
+    repositoryDataFrame = _rename(repositoryDataFrame, REPOSITORY_COLUMNS)
+    # Creation year drives the language trend chart
+    return repositoryDataFrame.assign(Year=creation_year(repositoryDataFrame['Created At']))
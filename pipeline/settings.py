@@ -0,0 +1,13 @@
+import os
+
+# Ingestion settings, overridable through environment variables so the same code can run on small and large hosts
+
+# Rows per chunk when streaming repository_data.csv; 0 parses the whole file with one read_csv call
+CHUNK_SIZE = int(os.environ.get('BEACON_CHUNK_SIZE', '0'))
+# Duplicate detection while streaming: 'hash' keeps a sorted array of 64-bit row hashes in memory, 'external' spills
+# rows to hash partitions on disk and de-duplicates each partition exactly
+DEDUPLICATION = os.environ.get('BEACON_DEDUPLICATION', 'hash')
+# Worker processes for the parallel CSV engine in pipeline/parallel.py; 0 uses every available core
+WORKERS = int(os.environ.get('BEACON_WORKERS', '0'))
+# Most points a scatter chart sends to the browser; larger datasets are binned or downsampled on the server first
+MAX_POINTS = int(os.environ.get('BEACON_MAX_POINTS', '5000'))
@@ -0,0 +1,439 @@
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+from pipeline import settings
+from pipeline.cleaning import clean_github_data, clean_repository_data
+from pipeline.compaction import LanguageLists, bytes_per_row, compact_repository_data
+from pipeline.incremental import prefix_fingerprint, tail_chunks
+from pipeline.instrumentation import stage, timed
+from pipeline.language_index import LanguageIndex
+from pipeline.loader import (DATA_DIR, GITHUB_DATASET, REPOSITORY_DATASET, file_digest, file_signature,
+                             read_github_csv, read_repository_chunks, read_repository_csv, replaced_atomically)
+from pipeline.preparation import REPOSITORY_COLUMNS, prepare_github_data, prepare_repository_data
+from pipeline.streaming import (CATEGORICAL_COLUMNS, DEFAULT_CHUNK_SIZE, HashedRowSet, arrow_table, clean_chunks,
+                                deduplicate, deduplicate_hashed, repository_schema, row_hashes)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Cleaned and prepared frames are written once as uncompressed Arrow IPC (Feather v2) files, which can be memory-mapped
+# and read column by column on later starts instead of re-parsing the CSVs
+CACHE_DIR = DATA_DIR / '.cache'
+MANIFEST = CACHE_DIR / 'manifest.json'
+STORE_VERSION = 5
+SOURCES = {'github': GITHUB_DATASET, 'repository': REPOSITORY_DATASET}
+# Rows of the raw repository CSV kept for the "before cleaning" preview
+PREVIEW_ROWS = 100
+# "Languages Used" of the repository table is kept apart from the Arrow file, as dictionary-encoded offset arrays
+LANGUAGES_DIR = CACHE_DIR / 'languages_used'
+# Inverted index of "Languages Used", from language to the row ids of the repository table
+LANGUAGE_INDEX_DIR = CACHE_DIR / 'language_index'
+# Sorted 64-bit hashes of the rows of the repository table, against which appended rows are de-duplicated
+REPOSITORY_HASHES = CACHE_DIR / 'repository_hashes.npy'
+# Held while the cache is built, so that processes starting together (replicas, or the CLI next to the app) do not
+# build it at the same time
+BUILD_LOCK = CACHE_DIR / 'build.lock'
+
+
+def table_path(name):
+    return CACHE_DIR / f'{name}.arrow'
+
+
+def table_paths(name, manifest=None):
+    """The Arrow file of a cached table followed by the parts appended to it since it was built, in row order."""
+    manifest = read_manifest() if manifest is None else manifest
+    return [table_path(name)] + [table_path(part) for part in (manifest or {}).get('parts', {}).get(name, [])]
+
+
+def _files_exist(manifest):
+    return (all(path.exists() for name in ('github_raw', 'repository_raw_head', 'github', 'repository')
+                for path in table_paths(name, manifest))
+            and all((LANGUAGES_DIR / name).exists() for name in ('codes.npy', 'offsets.npy', 'vocabulary.json'))
+            and all((LANGUAGE_INDEX_DIR / name).exists() for name in ('offsets.npy', 'rows.npy', 'vocabulary.json'))
+            and REPOSITORY_HASHES.exists())
+
+
+def _source_entry(path):
+    mtime_ns, size = file_signature(path)
+    return {'mtime_ns': mtime_ns, 'size': size, 'sha256': file_digest(path)}
+
+
+def _dataset_fingerprint(sources):
+    digest = hashlib.sha256(str(STORE_VERSION).encode())
+    for name in sorted(sources):
+        digest.update(f'{name}:{sources[name]["sha256"]}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def _write_table(name, dataFrame):
+    # Feather only stores a default index
+    with replaced_atomically(table_path(name)) as temporaryPath:
+        feather.write_feather(dataFrame.reset_index(drop=True), temporaryPath, compression='uncompressed')
+
+
+def _write_batches(name, chunks, schema):
+    # Streams frames into one Arrow file, one record batch per frame, without holding the whole table in memory. The
+    # schema is fixed up front rather than taken from the first frame, where an all-missing column has no type
+    rows = 0
+    with replaced_atomically(table_path(name)) as temporaryPath, pa.ipc.new_file(temporaryPath, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(arrow_table(chunk, schema))
+            rows += len(chunk)
+    return rows
+
+
+def _write_hashes(hashes):
+    with replaced_atomically(REPOSITORY_HASHES) as temporaryPath, open(temporaryPath, 'wb') as file:
+        np.save(file, np.sort(hashes))
+
+
+def _write_manifest(manifest):
+    with replaced_atomically(MANIFEST) as temporaryPath:
+        temporaryPath.write_text(json.dumps(manifest, indent=2))
+
+
+def read_manifest():
+    try:
+        return json.loads(MANIFEST.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _build_repository_tables():
+    repositoryDataFrame = read_repository_csv(REPOSITORY_DATASET)
+    _write_table('repository_raw_head', repositoryDataFrame[:PREVIEW_ROWS])
+    rawShape = repositoryDataFrame.shape
+    repositoryDataFrame = prepare_repository_data(clean_repository_data(repositoryDataFrame))
+    _write_hashes(row_hashes(repositoryDataFrame))
+    compacted, languages = compact_repository_data(repositoryDataFrame)
+    logger.info('Compacted repository table from %.1f to %.1f bytes per row', bytes_per_row(repositoryDataFrame),
+                bytes_per_row(compacted, languages))
+    _write_table('repository', compacted)
+    languages.save(LANGUAGES_DIR)
+    return rawShape, repositoryDataFrame.shape
+
+
+def _build_repository_tables_streaming(chunksize):
+    shapes = {'rows': 0, 'columns': 0}
+
+    def observe_raw(chunks):
+        for chunk in chunks:
+            if not shapes['rows']:
+                _write_table('repository_raw_head', chunk[:PREVIEW_ROWS])
+            shapes['rows'] += len(chunk)
+            shapes['columns'] = chunk.shape[1]
+            yield chunk
+
+    languageParts = []
+    hashParts = []
+
+    def compact_prepared(chunks):
+        # Integer widths are left alone: every batch of one Arrow file needs the same schema, and a chunk cannot know
+        # the range of the whole column
+        for chunk in chunks:
+            shapes['preparedColumns'] = chunk.shape[1]
+            hashParts.append(row_hashes(chunk))
+            vocabulary = languageParts[-1].vocabulary if languageParts else ()
+            chunk, languages = compact_repository_data(chunk, vocabulary, downcast=False)
+            languageParts.append(languages)
+            yield chunk
+
+    chunks = observe_raw(read_repository_chunks(REPOSITORY_DATASET, chunksize))
+    schema = repository_schema([column for column in repository_schema().names if column != 'Languages Used'])
+    rows = _write_batches('repository', compact_prepared(deduplicate(clean_chunks(chunks))), schema)
+    LanguageLists.concatenate(languageParts).save(LANGUAGES_DIR)
+    _write_hashes(np.concatenate(hashParts) if hashParts else np.empty(0, dtype=np.uint64))
+    return (shapes['rows'], shapes['columns']), (rows, shapes['preparedColumns'])
+
+
+@timed('store:build')
+def build_store(chunksize=None):
+    """Parse both CSVs, clean and prepare them, and write the columnar cache. Returns the new manifest.
+
+    With ``chunksize`` (default ``settings.CHUNK_SIZE``) the repository CSV is streamed through the chunked pipeline in
+    pipeline/streaming.py, so building the cache never holds the whole dataset in memory.
+    """
+    start = time.perf_counter()
+    chunksize = settings.CHUNK_SIZE if chunksize is None else chunksize
+    CACHE_DIR.mkdir(exist_ok=True)
+    sources = {name: _source_entry(path) for name, path in SOURCES.items()}
+
+    githubDataFrame = read_github_csv(GITHUB_DATASET)
+    _write_table('github_raw', githubDataFrame)
+    shapes = {'github_raw': githubDataFrame.shape}
+    githubDataFrame = prepare_github_data(clean_github_data(githubDataFrame))
+    _write_table('github', githubDataFrame)
+    shapes['github'] = githubDataFrame.shape
+
+    with stage('store:repository', chunksize=chunksize):
+        if chunksize:
+            shapes['repository_raw'], shapes['repository'] = _build_repository_tables_streaming(chunksize)
+        else:
+            shapes['repository_raw'], shapes['repository'] = _build_repository_tables()
+    with stage('store:language_index'):
+        LanguageIndex.from_language_lists(read_languages_used()).save(LANGUAGE_INDEX_DIR)
+
+    manifest = {
+        'version': STORE_VERSION,
+        'fingerprint': _dataset_fingerprint(sources),
+        'sources': sources,
+        'shapes': shapes,
+        'repositoryTail': _repository_tail(sources['repository']['size']),
+    }
+    _write_manifest(manifest)
+    # Parts appended to the previous build are not in the new manifest
+    for path in CACHE_DIR.glob('repository.*.arrow'):
+        path.unlink(missing_ok=True)
+    logger.info('Built columnar cache %s in %.2fs', manifest['fingerprint'], time.perf_counter() - start)
+    return manifest
+
+
+def _repository_tail(size):
+    # Where an append to the repository CSV resumes. Only a file that ends with a complete line can be continued
+    with open(REPOSITORY_DATASET, 'rb') as file:
+        file.seek(max(size - 1, 0))
+        if file.read(1) != b'\n':
+            return None
+        return {'offset': size, 'fingerprint': prefix_fingerprint(file, size)}
+
+
+def _unchanged(entry, path):
+    mtime_ns, size = file_signature(path)
+    # A changed mtime alone (e.g. a fresh checkout) only invalidates the cache if the contents differ
+    return (mtime_ns, size) == (entry['mtime_ns'], entry['size']) or (
+        size == entry['size'] and file_digest(path) == entry['sha256'])
+
+
+def is_fresh(manifest):
+    if manifest is None or manifest.get('version') != STORE_VERSION or not _files_exist(manifest):
+        return False
+    touched = False
+    for name, path in SOURCES.items():
+        entry = manifest['sources'][name]
+        if not _unchanged(entry, path):
+            return False
+        mtime_ns = file_signature(path)[0]
+        if mtime_ns != entry['mtime_ns']:
+            entry['mtime_ns'] = mtime_ns
+            touched = True
+    if touched:
+        _write_manifest(manifest)
+    return True
+
+
+def _append_repository_rows(manifest, chunksize=None):
+    """Add the rows appended to the repository CSV since ``manifest`` was written to the cache, as a new Arrow part.
+
+    Only the appended bytes are parsed; they are cleaned and prepared like a chunked build and de-duplicated against
+    the stored row hashes. Returns the new manifest, or None if the cache has to be rebuilt instead: the CSV changed
+    other than by an append, the GitHub CSV changed too, or an appended value does not fit the table's column types.
+    """
+    if (manifest is None or manifest.get('version') != STORE_VERSION or manifest.get('repositoryTail') is None
+            or not _files_exist(manifest) or not _unchanged(manifest['sources']['github'], GITHUB_DATASET)
+            # The preview holds the first rows of the raw CSV, and appended rows could belong in it
+            or manifest['shapes']['repository_raw'][0] < PREVIEW_ROWS):
+        return None
+    start = time.perf_counter()
+    offset = manifest['repositoryTail']['offset']
+    with open(REPOSITORY_DATASET, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size <= offset or prefix_fingerprint(file, offset) != manifest['repositoryTail']['fingerprint']:
+            return None
+        # The language arrays and the hashes are replaced below, before the new manifest is written; until then the
+        # cache must not look appendable, or a crash in between would append the same rows twice
+        _write_manifest({**manifest, 'repositoryTail': None})
+
+        file.seek(0)
+        header = file.readline()
+        file.seek(offset)
+        with stage('store:append', bytes=size - offset) as details:
+            with pa.memory_map(str(table_path('repository'))) as source:
+                schema = pa.ipc.open_file(source).schema
+            stored = read_languages_used()
+            rowSet = HashedRowSet(np.load(REPOSITORY_HASHES))
+            parts = list(manifest.get('parts', {}).get('repository', []))
+            languageParts = []
+            counts = {'rawRows': 0}
+
+            def observe_raw(chunks):
+                for chunk in chunks:
+                    counts['rawRows'] += len(chunk)
+                    yield chunk
+
+            rows = 0
+            chunksize = chunksize or settings.CHUNK_SIZE or DEFAULT_CHUNK_SIZE
+            chunks = observe_raw(tail_chunks(file, header, size, chunksize))
+            for chunk in deduplicate_hashed(clean_chunks(chunks), rowSet):
+                if not len(chunk):
+                    continue
+                chunk, languages = compact_repository_data(
+                    chunk, (languageParts[-1] if languageParts else stored).vocabulary, downcast=False)
+                # One part per chunk: an Arrow file cannot change the dictionaries of its categoricals between batches
+                parts.append(f'repository.{len(parts) + 1}')
+                try:
+                    # Converted to the stored schema, whose integer widths a whole-file build narrowed to its values
+                    _write_batches(parts[-1], [chunk], schema)
+                except pa.ArrowInvalid as error:
+                    logger.info('Rebuilding the columnar cache: appended rows do not fit it (%s)', error)
+                    return None
+                languageParts.append(languages)
+                rows += len(chunk)
+            details['distinctRows'] = rows
+
+            baseRows = manifest['shapes']['repository'][0]
+            if languageParts:
+                LanguageLists.concatenate([stored, *languageParts]).save(LANGUAGES_DIR)
+                read_language_index().extended(LanguageLists.concatenate(languageParts), baseRows).save(
+                    LANGUAGE_INDEX_DIR)
+                _write_hashes(rowSet.hashes)
+
+    sources = {'github': manifest['sources']['github'], 'repository': _source_entry(REPOSITORY_DATASET)}
+    rawShape, shape = manifest['shapes']['repository_raw'], manifest['shapes']['repository']
+    manifest = {
+        'version': STORE_VERSION,
+        'fingerprint': _dataset_fingerprint(sources),
+        'sources': sources,
+        'shapes': {**manifest['shapes'], 'repository_raw': [rawShape[0] + counts['rawRows'], rawShape[1]],
+                   'repository': [baseRows + rows, shape[1]]},
+        'parts': {'repository': parts},
+        'repositoryTail': _repository_tail(sources['repository']['size']),
+    }
+    _write_manifest(manifest)
+    logger.info('Appended %d new bytes, %d new distinct rows to columnar cache %s in %.2fs', size - offset, rows,
+                manifest['fingerprint'], time.perf_counter() - start)
+    return manifest
+
+
+@contextlib.contextmanager
+def _build_lock():
+    # flock is released when the file is closed, also if the process dies; Windows has no fcntl and does not lock
+    CACHE_DIR.mkdir(exist_ok=True)
+    with open(BUILD_LOCK, 'a') as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        yield
+
+
+def ensure_store(force=False, chunksize=None):
+    """Return the manifest of an up-to-date columnar cache, building it first if the CSVs changed."""
+    manifest = None if force else read_manifest()
+    if is_fresh(manifest):
+        return manifest
+    with _build_lock():
+        # A process that waited for the lock usually finds the cache the previous holder just built
+        manifest = None if force else read_manifest()
+        if is_fresh(manifest):
+            return manifest
+        # Rows appended to the repository CSV are added to the cache; any other change rebuilds it
+        return _append_repository_rows(manifest, chunksize) or build_store(chunksize)
+
+
+def _categories(schema):
+    # A chunked build stores categoricals as strings (see arrow_table); converting them back on read keeps dtypes,
+    # memory use and the categorical code paths the same as after a whole-frame build
+    return [column for column in CATEGORICAL_COLUMNS if column in schema.names]
+
+
+def read_table(name, columns=None, rows=None):
+    """Read ``columns`` (default all) of a cached table; only the requested columns are mapped into memory.
+
+    "Languages Used" of the repository table is decoded back to its original strings, one Python string per row, so
+    only ask for it on previews.
+    """
+    with stage(f'read:{name}', columns=columns, rows=rows):
+        languagesUsed = name == 'repository' and (columns is None or 'Languages Used' in columns)
+        stored = [column for column in columns if column != 'Languages Used'] if columns is not None else None
+        table = pa.concat_tables([
+            feather.read_table(path, columns=stored if languagesUsed else columns, memory_map=True)
+            for path in table_paths(name)])
+        if rows is not None:
+            table = table.slice(0, rows)
+        dataFrame = table.to_pandas(categories=_categories(table.schema))
+        if languagesUsed:
+            dataFrame.insert(min(REPOSITORY_COLUMNS.index('Languages Used'), dataFrame.shape[1]), 'Languages Used',
+                             read_languages_used().to_strings(len(dataFrame)))
+            if columns is not None:
+                dataFrame = dataFrame[list(columns)]
+        return dataFrame
+
+
+def read_languages_used():
+    """``LanguageLists`` of the repository table, row for row, memory-mapped."""
+    return LanguageLists.load(LANGUAGES_DIR)
+
+
+def read_language_index():
+    """``LanguageIndex`` from language to row ids of the repository table, memory-mapped."""
+    return LanguageIndex.load(LANGUAGE_INDEX_DIR)
+
+
+def iter_batches(name, columns=None):
+    """Yield a cached table as frames of one record batch each, for folding over it in bounded memory."""
+    start = 0
+    for path in table_paths(name):
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                batch = batch.select(columns) if columns is not None else batch
+                dataFrame = batch.to_pandas(categories=_categories(batch.schema))
+                # Rows are labelled by their position in the whole table, as in read_table, not in their batch
+                dataFrame.index = pd.RangeIndex(start, start + len(dataFrame))
+                start += len(dataFrame)
+                yield dataFrame
+
+
+@st.cache_resource(show_spinner='Preparing datasets...')
+def _ensure_store(signatures):
+    return ensure_store()
+
+
+def load_manifest():
+    # Source file signatures are cheap to stat on every rerun and make the cache rebuild when a CSV changes
+    return _ensure_store(tuple(file_signature(path) for path in SOURCES.values()))
+
+
+# cache_resource hands every session the same frame instead of unpickling a copy, so callers must treat the result
+# as read-only
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _load_table(name, columns, rows, fingerprint):
+    return read_table(name, list(columns) if columns is not None else None, rows)
+
+
+def load_table(name, columns=None, rows=None):
+    manifest = load_manifest()
+    return _load_table(name, tuple(columns) if columns is not None else None, rows, manifest['fingerprint'])
+
+
+def load_shape(name):
+    return tuple(load_manifest()['shapes'][name])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the columnar cache of the cleaned GitHub datasets.')
+    parser.add_argument('--force', action='store_true', help='rebuild even if the cache is up to date')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream the repository CSV in chunks of this many rows (0 reads it in one go)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    manifest = ensure_store(force=args.force, chunksize=args.chunksize)
+    print(f'Columnar cache {manifest["fingerprint"]} at {CACHE_DIR}')
+
+
+if __name__ == '__main__':
+    main()
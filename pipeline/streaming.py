@@ -0,0 +1,309 @@
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from pipeline import settings
+from pipeline.cleaning import NO_LANGUAGE, fill_repository_languages
+from pipeline.loader import REPOSITORY_DATASET, REPOSITORY_DTYPES, read_repository_chunks
+from pipeline.preparation import REPOSITORY_COLUMNS, prepare_repository_data
+from pipeline.topk import top_k_rows
+
+logger = logging.getLogger(__name__)
+
+# Streaming ingestion of repository_data.csv: chunks flow through a chain of generators (read -> clean -> de-duplicate)
+# and are folded into running aggregates, so peak memory depends on the chunk size rather than on the file size.
+
+DEFAULT_CHUNK_SIZE = 100_000
+TOP_COLUMNS = ['Star Count', 'Fork Count', 'Watchers', 'Pull Requests', 'Commit Count']
+# Source column behind each prepared repository column, in the order of REPOSITORY_COLUMNS
+SOURCE_COLUMNS = ['name', 'stars_count', 'forks_count', 'watchers', 'pull_requests', 'primary_language',
+                  'languages_used', 'commit_count', 'created_at', 'licence']
+# Prepared columns the loader reads as categoricals; Arrow files written chunk by chunk hold them as plain strings
+CATEGORICAL_COLUMNS = [column for column, source in zip(REPOSITORY_COLUMNS, SOURCE_COLUMNS)
+                       if REPOSITORY_DTYPES.get(source) == 'category']
+
+
+def repository_schema(columns=None):
+    """Arrow schema of the prepared repository frame (restricted to ``columns``), from the loader's dtypes.
+
+    Inferring the schema from a chunk goes wrong as soon as a column is all missing in it: it becomes Arrow type
+    ``null`` and every later chunk with a value in that column fails to convert. Text and categorical columns are
+    stored as strings; the pandas metadata keeps the nullable integer dtypes when the table is read back.
+    """
+    dtypes = {column: REPOSITORY_DTYPES.get(source, 'datetime64[ns]')
+              for column, source in zip(REPOSITORY_COLUMNS, SOURCE_COLUMNS)}
+    dtypes = {column: object if dtype in ('category', 'object') else dtype for column, dtype in dtypes.items()}
+    dtypes['Year'] = 'Int16'
+    columns = list(dtypes) if columns is None else list(columns)
+    # One row of the right dtypes with text in every string column, so that no column is inferred as null
+    sample = pd.DataFrame({column: ['' if dtypes[column] == object else None] for column in columns})
+    return pa.Schema.from_pandas(sample.astype({column: dtypes[column] for column in columns}), preserve_index=False)
+
+
+def arrow_table(chunk, schema=None):
+    # Category dictionaries differ from chunk to chunk and an Arrow file cannot replace them between batches, so
+    # categoricals are written as plain strings
+    categoricalColumns = [column for column, dtype in chunk.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    chunk = chunk.astype({column: object for column in categoricalColumns})
+    return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def clean_chunks(chunks):
+    for chunk in chunks:
+        yield prepare_repository_data(fill_repository_languages(chunk))
+
+
+def row_hashes(chunk):
+    # Hashes the values, not the dtype, so a categorical and a string column holding the same text hash alike
+    return pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+
+
+class HashedRowSet:
+    """Sorted array of 64-bit hashes of every row seen so far (8 bytes per distinct row)."""
+
+    def __init__(self, hashes=None):
+        self.hashes = np.empty(0, dtype=np.uint64) if hashes is None else np.sort(hashes)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def contains(self, hashes):
+        if not len(self.hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.searchsorted(self.hashes, hashes).clip(max=len(self.hashes) - 1)
+        return self.hashes[positions] == hashes
+
+    def add(self, hashes):
+        """Add ``hashes`` and return a mask of the ones that were new (first occurrence only)."""
+        new = ~pd.Series(hashes).duplicated().to_numpy() & ~self.contains(hashes)
+        # Concatenating two sorted runs and sorting with timsort is a linear merge
+        self.hashes = np.concatenate([self.hashes, np.sort(hashes[new])])
+        self.hashes.sort(kind='stable')
+        return new
+
+
+def deduplicate_hashed(chunks, rowSet=None):
+    """Drop rows already seen in this or an earlier chunk, keeping the first occurrence and the row order.
+
+    Rows are compared by a 64-bit hash; for the ~3M rows of the repository dataset the chance of any collision is
+    around 1e-7. Use ``deduplicate_external`` when an exact comparison is required.
+    """
+    rowSet = HashedRowSet() if rowSet is None else rowSet
+    for chunk in chunks:
+        yield chunk[rowSet.add(row_hashes(chunk))]
+
+
+def deduplicate_external(chunks, partitions=64, directory=None):
+    """Exact de-duplication that spills rows to disk, partitioned by row hash.
+
+    Identical rows always land in the same partition, so each partition can be de-duplicated on its own with
+    ``duplicated``. Every row is spilled twice, once to its partition together with its position in the input and once
+    to a copy of the input, which is then read back in order keeping only first occurrences. The output matches
+    ``deduplicate_hashed``, row order and index included. Memory is bounded by the largest partition plus a byte per
+    row.
+    """
+    with tempfile.TemporaryDirectory(dir=directory) as spillDirectory:
+        spillPath = Path(spillDirectory)
+        writers = {}
+        orderWriter = schema = None
+        rows = 0
+        try:
+            for chunk in chunks:
+                if schema is None:
+                    schema = repository_schema(chunk.columns)
+                    categoricalColumns = [column for column, dtype in chunk.dtypes.items()
+                                          if isinstance(dtype, pd.CategoricalDtype)]
+                    orderWriter = pa.ipc.new_file(spillPath / 'order.arrow', schema)
+                table = arrow_table(chunk, schema)
+                orderWriter.write_table(table)
+                numbered = table.append_column('__row', pa.array(np.arange(rows, rows + len(chunk))))
+                rows += len(chunk)
+                partitionOf = row_hashes(chunk) % partitions
+                for partition in np.unique(partitionOf):
+                    if partition not in writers:
+                        writers[partition] = pa.ipc.new_file(spillPath / f'{partition}.arrow', numbered.schema)
+                    writers[partition].write_table(numbered.filter(pa.array(partitionOf == partition)))
+        finally:
+            for writer in [orderWriter, *writers.values()]:
+                if writer is not None:
+                    writer.close()
+        if orderWriter is None:
+            return
+
+        keep = np.zeros(rows, dtype=bool)
+        for partition in sorted(writers):
+            spilled = feather.read_table(spillPath / f'{partition}.arrow').to_pandas()
+            # Each partition holds its rows in input order, so the first of a set of duplicates is its first occurrence
+            keep[spilled['__row'].to_numpy()[~spilled.drop(columns='__row').duplicated().to_numpy()]] = True
+        with pa.memory_map(str(spillPath / 'order.arrow')) as source:
+            reader = pa.ipc.open_file(source)
+            start = 0
+            for batch in range(reader.num_record_batches):
+                chunk = reader.get_batch(batch).to_pandas(categories=categoricalColumns)
+                chunk.index = pd.RangeIndex(start, start + len(chunk))
+                yield chunk[keep[start:start + len(chunk)]]
+                start += len(chunk)
+
+
+def deduplicate(chunks, mode=None):
+    mode = mode or settings.DEDUPLICATION
+    if mode == 'hash':
+        return deduplicate_hashed(chunks)
+    if mode == 'external':
+        return deduplicate_external(chunks)
+    raise ValueError(f"Unknown de-duplication mode {mode!r}, expected 'hash' or 'external'")
+
+
+def stream_repository_data(path=REPOSITORY_DATASET, chunksize=None, deduplication=None):
+    """Yield the cleaned, prepared and de-duplicated repository dataset chunk by chunk."""
+    chunks = read_repository_chunks(path, chunksize or settings.CHUNK_SIZE or DEFAULT_CHUNK_SIZE)
+    return deduplicate(clean_chunks(chunks), deduplication)
+
+
+def _plain_index(counts):
+    # Category dictionaries differ between chunks; plain values let counts from different chunks line up
+    if isinstance(counts.index, pd.MultiIndex):
+        counts.index = pd.MultiIndex.from_arrays(
+            [counts.index.get_level_values(level).astype(object) for level in range(counts.index.nlevels)],
+            names=counts.index.names)
+    else:
+        counts.index = counts.index.astype(object)
+    return counts[counts > 0]
+
+
+def _add_counts(total, counts):
+    return _plain_index(counts) if total is None else total.add(_plain_index(counts), fill_value=0)
+
+
+def masked_counts(column, mask):
+    """``column[mask].value_counts()`` without building the filtered column.
+
+    Categorical columns are counted straight from their integer codes; other columns fall back to ``value_counts``.
+    """
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        return column[mask].value_counts()
+    codes = column.cat.codes.to_numpy()
+    counts = np.bincount(codes[np.asarray(mask, dtype=bool) & (codes >= 0)], minlength=len(column.cat.categories))
+    return pd.Series(counts, index=column.cat.categories, name='count').sort_values(ascending=False, kind='stable')
+
+
+def _top_rows(current, candidates, column, k, mask=None):
+    candidates = top_k_rows(candidates, column, k, mask)
+    if current is None:
+        return candidates
+    return top_k_rows(pd.concat([current, candidates]), column, k)
+
+
+def language_trend(trendCounts):
+    """Top 5 primary languages per year as a Year x language table, from ``RunningAggregates.trend_counts()``."""
+    # Plain strings so the columns come out in alphabetical order rather than category order
+    trendCounts = trendCounts.astype({'Year': str, 'Primary Language': str})
+    trendCounts = trendCounts.sort_values(['Year', 'Star Count'], ascending=[True, False]).groupby('Year').head(5)
+    trend = pd.pivot_table(trendCounts, values='Star Count', index='Year', columns='Primary Language')
+    return trend.fillna(0).reset_index()
+
+
+def _sorted_counts(counts):
+    if counts is None:
+        return pd.Series(dtype='int64')
+    # Ties keep index order, so every engine that produced the same counts lists them in the same order
+    return counts.astype('int64').sort_index().sort_values(ascending=False, kind='stable')
+
+
+class RunningAggregates:
+    """Counts and top-k rows folded in chunk by chunk, so memory does not grow with the number of rows.
+
+    Tracks repositories per (Year, Primary Language), per primary language and per licence, and the ``k`` rows with
+    the largest value of each of ``topColumns``. Like the charts, the language, licence and top-k results leave out
+    repositories with no language specified.
+    """
+
+    def __init__(self, topColumns=TOP_COLUMNS, k=10):
+        self.topColumns = list(topColumns)
+        self.k = k
+        self.rows = 0
+        self.trendCounts = None
+        self.languageCounts = None
+        self.licenseCounts = None
+        self.top = {column: None for column in self.topColumns}
+
+    @property
+    def columns(self):
+        """Columns ``update`` reads from each chunk."""
+        columns = ['Year', 'Primary Language', 'License', 'Star Count']
+        if self.topColumns:
+            columns += ['Name'] + [column for column in self.topColumns if column not in columns]
+        return columns
+
+    def update(self, chunk):
+        specified = (chunk['Primary Language'] != NO_LANGUAGE).to_numpy()
+        self.add_counts(
+            len(chunk),
+            chunk.groupby(['Year', 'Primary Language'], observed=True)['Star Count'].count(),
+            masked_counts(chunk['Primary Language'], specified),
+            masked_counts(chunk['License'], specified),
+        )
+        if self.topColumns:
+            self.add_top_candidates(chunk, specified)
+        return self
+
+    def add_counts(self, rows, trendCounts, languageCounts, licenseCounts):
+        """Fold in counts computed elsewhere, e.g. by the worker processes in pipeline/parallel.py."""
+        self.rows += rows
+        self.trendCounts = _add_counts(self.trendCounts, trendCounts)
+        self.languageCounts = _add_counts(self.languageCounts, languageCounts)
+        self.licenseCounts = _add_counts(self.licenseCounts, licenseCounts)
+
+    def add_top_candidates(self, candidates, mask=None):
+        """Fold in rows (where ``mask``) that may belong in the top-k; on ties rows already held (earlier) win."""
+        for column in self.topColumns:
+            self.top[column] = _top_rows(self.top[column], candidates, column, self.k, mask)
+
+    def trend_counts(self):
+        """Repositories per (Year, Primary Language) as a frame shaped like ``groupby(...).count()``."""
+        counts = _sorted_counts(self.trendCounts).sort_index()
+        return counts.rename('Star Count').reset_index()
+
+    def language_counts(self):
+        return _sorted_counts(self.languageCounts).rename_axis('Primary Language').rename('count')
+
+    def license_counts(self):
+        return _sorted_counts(self.licenseCounts).rename_axis('License').rename('count')
+
+    def top_rows(self, column):
+        return self.top[column][['Name', column]]
+
+    def report(self):
+        """Plain-text summary printed by the command-line engines: row count, top-10 counts, trend and top-k rows."""
+        return '\n'.join([f'{self.rows} distinct rows', self.language_counts()[:10].to_string(),
+                          self.license_counts()[:10].to_string(),
+                          language_trend(self.trend_counts()).to_string(index=False)]
+                         + [self.top_rows(column).to_string(index=False) for column in self.topColumns])
+
+
+def stream_aggregates(path=REPOSITORY_DATASET, chunksize=None, deduplication=None, topColumns=TOP_COLUMNS, k=10):
+    running = RunningAggregates(topColumns, k)
+    for chunk in stream_repository_data(path, chunksize, deduplication):
+        running.update(chunk)
+    return running
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate repository_data.csv in bounded memory.')
+    parser.add_argument('path', nargs='?', default=REPOSITORY_DATASET, type=Path)
+    parser.add_argument('--chunksize', type=int, default=None, help=f'rows per chunk (default {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--deduplication', choices=['hash', 'external'], default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    running = stream_aggregates(args.path, args.chunksize, args.deduplication)
+    print(running.report())
+
+
+if __name__ == '__main__':
+    main()
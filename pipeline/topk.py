@@ -0,0 +1,45 @@
+import numpy as np
+
+
+def top_k_positions(values, k):
+    """Positions of the ``k`` largest non-missing ``values``, largest first; ties go to the earlier position.
+
+    Equivalent to ``Series.nlargest(k, keep='first')`` but uses a linear-time partial selection (``np.partition``)
+    instead of a sort, and only the (at most ``k``) selected positions are ever sorted.
+    """
+    values = np.asarray(values, dtype='float64')
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) > k:
+        threshold = np.partition(values[valid], len(valid) - k)[len(valid) - k]
+        above = np.flatnonzero(values > threshold)
+        ties = np.flatnonzero(values == threshold)[:k - len(above)]
+        valid = np.concatenate([above, ties])
+    return valid[np.lexsort((valid, -values[valid]))]
+
+
+def top_k(dataFrame, columns, k=10, labels=('Name',), mask=None):
+    """Top ``k`` rows of ``dataFrame`` for each of ``columns`` as ``{column: frame of labels + column}``.
+
+    Each column is scanned once, so computing all the "Top 10" charts costs a handful of linear passes rather than a
+    full ``sort_values`` of the frame per chart.
+    """
+    labels = [label for label in labels if label in dataFrame.columns]
+    return {column: top_k_rows(dataFrame, column, k, mask)[labels + [column]] for column in columns}
+
+
+def top_k_rows(dataFrame, column, k=10, mask=None):
+    """Whole rows of ``dataFrame`` with the ``k`` largest values of ``column`` (ties: earlier rows first).
+
+    With a boolean ``mask`` only rows where it is true are considered. Filtering this way copies one float column
+    instead of every column of the frame, and only the ``k`` selected rows are ever taken out of it.
+    """
+    values = _as_float(dataFrame[column])
+    if mask is not None:
+        values[~np.asarray(mask, dtype=bool)] = np.nan
+    return dataFrame.iloc[top_k_positions(values, k)]
+
+
+def _as_float(column):
+    # Nullable integer columns become float with NaN for missing values, which np.partition can handle. Always a new
+    # array, so callers may write to it
+    return column.to_numpy(dtype='float64', na_value=np.nan, copy=True)